@@ -0,0 +1,235 @@
+"""
+Admission Control Module
+Estimates the cost of an analysis job before it runs and enforces
+service-wide concurrency and memory budgets.
+
+process_video keeps every decoded frame in memory (plus an annotated copy),
+so a single long 1080p upload can allocate several gigabytes. Jobs are only
+admitted while the estimated memory of all running jobs fits the budget.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import cv2
+
+
+# Rough per-feature overheads, calibrated on the CPU prototype
+FEATURE_MEMORY_MB = {
+    'base': 350.0,                # MediaPipe pose graph + interpreter
+    'court_detection': 250.0,     # keypoint RCNN weights and activations
+    'shuttle_tracking': 120.0,    # TrackNet weights and activations
+    'advanced_analysis': 20.0,    # perspective + template library
+}
+
+# Per-frame processing time multipliers relative to pose-only analysis
+FEATURE_TIME_FACTOR = {
+    'court_detection': 0.1,
+    'shuttle_tracking': 0.6,
+    'advanced_analysis': 0.05,
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job cannot be admitted within the current budgets"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Cost-aware admission control for analysis jobs"""
+
+    def __init__(self, max_concurrent_jobs: int = 2,
+                 memory_budget_mb: float = 4096.0,
+                 max_queued_jobs: int = 0,
+                 frames_per_second: float = 12.0):
+        """
+        Args:
+            max_concurrent_jobs: Jobs allowed to run at the same time
+            memory_budget_mb: Total estimated memory allowed across running jobs
+            max_queued_jobs: Jobs allowed to wait for a free slot (0 = reject immediately)
+            frames_per_second: Expected pose-only processing throughput, used
+                               to estimate job duration and Retry-After
+        """
+        self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+        self.memory_budget_mb = float(memory_budget_mb)
+        self.max_queued_jobs = max(0, int(max_queued_jobs))
+        self.frames_per_second = max(0.1, float(frames_per_second))
+
+        self._cond = threading.Condition()
+        self._running: Dict[str, Dict] = {}
+        self._queued = 0
+        self._admitted_total = 0
+        self._rejected = {'concurrency': 0, 'memory': 0, 'too_large': 0}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build controller from ADMISSION_* environment variables"""
+        return cls(
+            max_concurrent_jobs=int(_env_float("ADMISSION_MAX_CONCURRENT_JOBS", 2)),
+            memory_budget_mb=_env_float("ADMISSION_MEMORY_BUDGET_MB", 4096.0),
+            max_queued_jobs=int(_env_float("ADMISSION_MAX_QUEUED_JOBS", 0)),
+            frames_per_second=_env_float("ADMISSION_FRAMES_PER_SECOND", 12.0),
+        )
+
+    def estimate_cost(self, video_path: str,
+                      enable_court_detection: bool = True,
+                      enable_shuttle_tracking: bool = True,
+                      enable_advanced_analysis: bool = True) -> Dict:
+        """
+        Estimate memory and run time of a job from the video header
+
+        Args:
+            video_path: Path to the uploaded video
+            enable_*: Feature flags the job will run with
+
+        Returns:
+            Dict with resolution, frame count, fps, memory_mb and seconds
+        """
+        cap = cv2.VideoCapture(video_path)
+        try:
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            fps = float(cap.get(cv2.CAP_PROP_FPS) or 25)
+        finally:
+            cap.release()
+
+        features = {
+            'court_detection': enable_court_detection,
+            'shuttle_tracking': enable_shuttle_tracking,
+            'advanced_analysis': enable_advanced_analysis,
+        }
+
+        # Decoded RGB frames are held twice (raw annotated + contact-annotated copy)
+        frame_mb = width * height * 3 / (1024 * 1024)
+        memory_mb = FEATURE_MEMORY_MB['base'] + 2 * frame_mb * frame_count
+        time_factor = 1.0
+        for name, enabled in features.items():
+            if enabled:
+                memory_mb += FEATURE_MEMORY_MB[name]
+                time_factor += FEATURE_TIME_FACTOR[name]
+
+        # Throughput scales roughly with pixel count relative to 720p
+        pixel_factor = max(1.0, (width * height) / (1280 * 720)) if width and height else 1.0
+        seconds = frame_count * time_factor * pixel_factor / self.frames_per_second
+
+        return {
+            'width': width,
+            'height': height,
+            'frame_count': frame_count,
+            'fps': fps,
+            'features': features,
+            'memory_mb': float(memory_mb),
+            'seconds': float(seconds),
+        }
+
+    def _memory_in_use(self) -> float:
+        return sum(job['cost']['memory_mb'] for job in self._running.values())
+
+    def _retry_after(self) -> int:
+        """Seconds until the earliest running job is expected to finish"""
+        if not self._running:
+            return 1
+        now = time.monotonic()
+        remaining = min(job['expected_end'] - now for job in self._running.values())
+        return int(min(300, max(1, math.ceil(remaining))))
+
+    def _fits(self, cost: Dict) -> bool:
+        return (len(self._running) < self.max_concurrent_jobs and
+                self._memory_in_use() + cost['memory_mb'] <= self.memory_budget_mb)
+
+    def check_capacity(self):
+        """
+        Cheap pre-check before accepting an upload body
+
+        Raises:
+            AdmissionRejected: If every slot is taken and the queue is full
+        """
+        with self._cond:
+            if (len(self._running) >= self.max_concurrent_jobs and
+                    self._queued >= self.max_queued_jobs):
+                self._rejected['concurrency'] += 1
+                raise AdmissionRejected('concurrency', self._retry_after())
+
+    def admit(self, job_id: str, cost: Dict, timeout: Optional[float] = None):
+        """
+        Reserve budget for a job, waiting in the queue if allowed
+
+        Args:
+            job_id: Unique job identifier
+            cost: Result of estimate_cost()
+            timeout: Max seconds to wait in the queue (None = estimated wait)
+
+        Raises:
+            AdmissionRejected: If the job does not fit the budgets
+        """
+        with self._cond:
+            if cost['memory_mb'] > self.memory_budget_mb:
+                self._rejected['too_large'] += 1
+                raise AdmissionRejected('too_large', self._retry_after())
+
+            if not self._fits(cost):
+                if self._queued >= self.max_queued_jobs:
+                    reason = ('concurrency'
+                              if len(self._running) >= self.max_concurrent_jobs
+                              else 'memory')
+                    self._rejected[reason] += 1
+                    raise AdmissionRejected(reason, self._retry_after())
+
+                wait = timeout if timeout is not None else self._retry_after()
+                deadline = time.monotonic() + wait
+                self._queued += 1
+                try:
+                    while not self._fits(cost):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            reason = ('concurrency'
+                                      if len(self._running) >= self.max_concurrent_jobs
+                                      else 'memory')
+                            self._rejected[reason] += 1
+                            raise AdmissionRejected(reason, self._retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self._queued -= 1
+
+            self._running[job_id] = {
+                'cost': cost,
+                'started': time.monotonic(),
+                'expected_end': time.monotonic() + cost['seconds'],
+            }
+            self._admitted_total += 1
+
+    def release(self, job_id: str):
+        """Return a job's budget and wake queued jobs"""
+        with self._cond:
+            self._running.pop(job_id, None)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        """Current queue depth, budget usage and rejection counters"""
+        with self._cond:
+            return {
+                'running_jobs': len(self._running),
+                'queued_jobs': self._queued,
+                'queue_depth': len(self._running) + self._queued,
+                'memory_in_use_mb': self._memory_in_use(),
+                'memory_budget_mb': self.memory_budget_mb,
+                'max_concurrent_jobs': self.max_concurrent_jobs,
+                'admitted_total': self._admitted_total,
+                'rejected_total': sum(self._rejected.values()),
+                'rejected_by_reason': dict(self._rejected),
+            }
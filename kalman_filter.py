@@ -0,0 +1,77 @@
+"""
+Kalman Filter Module
+Constant-acceleration motion model for 2D image-space trajectories
+
+Used by ShuttlecockTracker to predict the next shuttle position, size the
+search window from the prediction uncertainty and smooth detections.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+
+class ConstantAccelerationKalman:
+    """Kalman filter over state [x, y, vx, vy, ax, ay] with a 1-frame time step"""
+
+    def __init__(self, process_noise: float = 4.0, measurement_noise: float = 9.0):
+        """
+        Args:
+            process_noise: Variance of the per-frame change in acceleration (px/frame^2)^2
+            measurement_noise: Variance of a detection's position (px^2)
+        """
+        dt = 1.0
+        self.F = np.eye(6)
+        self.F[0, 2] = self.F[1, 3] = dt
+        self.F[2, 4] = self.F[3, 5] = dt
+        self.F[0, 4] = self.F[1, 5] = 0.5 * dt * dt
+
+        self.H = np.zeros((2, 6))
+        self.H[0, 0] = self.H[1, 1] = 1.0
+
+        # Jerk-driven process noise (discrete white-noise jerk model per axis)
+        g = np.array([dt ** 3 / 6.0, dt ** 2 / 2.0, dt])
+        q_axis = np.outer(g, g) * process_noise
+        self.Q = np.zeros((6, 6))
+        for axis in (0, 1):
+            idx = [axis, axis + 2, axis + 4]
+            self.Q[np.ix_(idx, idx)] = q_axis
+
+        self.R = np.eye(2) * measurement_noise
+        self.x = np.zeros(6)
+        self.P = np.eye(6)
+        self.initialized = False
+
+    def initialize(self, position: Tuple[float, float]):
+        """Start a new track at a measured position with unknown motion"""
+        self.x = np.array([position[0], position[1], 0.0, 0.0, 0.0, 0.0])
+        self.P = np.diag([self.R[0, 0], self.R[1, 1], 400.0, 400.0, 100.0, 100.0])
+        self.initialized = True
+
+    def predict(self) -> Optional[Tuple[float, float]]:
+        """Advance the state by one frame and return the predicted position"""
+        if not self.initialized:
+            return None
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return (float(self.x[0]), float(self.x[1]))
+
+    def update(self, position: Tuple[float, float]) -> Tuple[float, float]:
+        """Correct the predicted state with a measurement; returns the filtered position"""
+        if not self.initialized:
+            self.initialize(position)
+            return (float(position[0]), float(position[1]))
+        z = np.asarray(position, dtype=np.float64)
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - self.H @ self.x)
+        self.P = (np.eye(6) - K @ self.H) @ self.P
+        return (float(self.x[0]), float(self.x[1]))
+
+    def position_sigma(self) -> float:
+        """1-sigma position uncertainty (px), larger of the two axes"""
+        return float(np.sqrt(max(self.P[0, 0], self.P[1, 1])))
+
+    def reset(self):
+        self.x = np.zeros(6)
+        self.P = np.eye(6)
+        self.initialized = False
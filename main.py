@@ -1,10 +1,15 @@
 from fastapi import FastAPI, File, UploadFile, Form
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from processor import process_video
+from admission import AdmissionController, AdmissionRejected
+from storage import StorageManager
+import metrics
 import shutil
 import uuid
 from pathlib import Path
 import os
+import time
 from typing import Optional
 
 app = FastAPI(title="Badminton Posture & Shot Analyzer v1.2")
@@ -14,6 +19,52 @@ OUTPUT_DIR = Path("outputs")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+admission = AdmissionController.from_env()
+storage = StorageManager.from_env(UPLOAD_DIR, OUTPUT_DIR)
+storage.reconcile()
+
+
+def _admission_gauges():
+    stats = admission.stats()
+    return {
+        (("state", "running"),): stats["running_jobs"],
+        (("state", "queued"),): stats["queued_jobs"],
+    }
+
+
+def _admission_rejections():
+    return {
+        (("reason", reason),): count
+        for reason, count in admission.stats()["rejected_by_reason"].items()
+    }
+
+
+def _storage_bytes():
+    return {
+        (("kind", kind),): info["bytes"]
+        for kind, info in storage.stats()["by_kind"].items()
+    }
+
+
+metrics.REGISTRY.gauge_callback("bd_admission_jobs", "Admitted jobs by state (queue depth)", _admission_gauges)
+metrics.REGISTRY.gauge_callback("bd_admission_rejected_jobs", "Jobs rejected by admission control since start", _admission_rejections)
+metrics.REGISTRY.gauge_callback("bd_storage_bytes", "Indexed artifact bytes by kind", _storage_bytes)
+
+
+def _record_upload(status: str, started: float, labels: dict):
+    if not metrics.METRICS_ENABLED:
+        return
+    metrics.UPLOADS.inc(status=status, **labels)
+    metrics.UPLOAD_SECONDS.observe(time.perf_counter() - started, status=status, **labels)
+
+
+def _busy_response(exc: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(
+        {"error": "server busy", "reason": exc.reason, "retry_after": exc.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 
 @app.get("/", response_class=HTMLResponse)
 async def index():
@@ -40,6 +91,16 @@ async def upload(
     - enable_shuttle_tracking: Enable shuttlecock tracking (v1.1)
     - enable_advanced_analysis: Enable perspective transform and professional comparison (v1.2)
     """
+    started = time.perf_counter()
+    labels = metrics.feature_labels(enable_court_detection, enable_shuttle_tracking, enable_advanced_analysis)
+
+    # reject early when every slot is taken, before reading the body
+    try:
+        admission.check_capacity()
+    except AdmissionRejected as exc:
+        _record_upload("rejected", started, labels)
+        return _busy_response(exc)
+
     # save uploaded file
     uid = uuid.uuid4().hex
     in_path = UPLOAD_DIR / f"{uid}_{file.filename}"
@@ -48,25 +109,54 @@ async def upload(
 
     with in_path.open("wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
+    storage.register(in_path, "upload", job_id=uid)
 
     # optionally pass model path from env
     shot_model_path = os.environ.get("SHOT_MODEL_PATH", None)
 
-    # process with feature flags
-    report = process_video(
-        str(in_path), 
-        str(out_video_path), 
-        shot_model_path=shot_model_path,
+    # estimate job cost and reserve budget (may wait in the queue)
+    cost = admission.estimate_cost(
+        str(in_path),
         enable_court_detection=enable_court_detection,
         enable_shuttle_tracking=enable_shuttle_tracking,
         enable_advanced_analysis=enable_advanced_analysis
     )
+    try:
+        await run_in_threadpool(admission.admit, uid, cost)
+    except AdmissionRejected as exc:
+        storage.release_upload(in_path)
+        _record_upload("rejected", started, labels)
+        return _busy_response(exc)
+
+    # process with feature flags
+    try:
+        report = await run_in_threadpool(
+            process_video,
+            str(in_path),
+            str(out_video_path),
+            shot_model_path=shot_model_path,
+            enable_court_detection=enable_court_detection,
+            enable_shuttle_tracking=enable_shuttle_tracking,
+            enable_advanced_analysis=enable_advanced_analysis
+        )
+    except Exception:
+        _record_upload("error", started, labels)
+        raise
+    finally:
+        admission.release(uid)
+        storage.release_upload(in_path)
 
     # save report
     import json
     with open(report_path, "w") as f:
         json.dump(report, f, indent=2)
 
+    # index new artifacts and evict old ones over the budget / TTL
+    storage.register(out_video_path, "video", job_id=uid)
+    storage.register(report_path, "report", job_id=uid)
+    storage.enforce(protect=[out_video_path, report_path])
+    _record_upload("done", started, labels)
+
     return JSONResponse({
         "status": "done",
         "annotated_video": str(out_video_path),
@@ -74,9 +164,28 @@ async def upload(
     })
 
 
+@app.get("/admission")
+async def admission_stats():
+    """Queue depth, budget usage and rejected-job counters"""
+    return JSONResponse(admission.stats())
+
+
+@app.get("/storage")
+async def storage_stats():
+    """Indexed artifact counts and bytes against the storage budget"""
+    return JSONResponse(storage.stats())
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of pipeline and API metrics"""
+    return PlainTextResponse(metrics.render_latest(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/outputs/{filename}")
 async def get_output(filename: str):
     path = OUTPUT_DIR / filename
     if not path.exists():
         return JSONResponse({"error": "not found"}, status_code=404)
+    storage.touch(path)
     return FileResponse(path, media_type="video/mp4")
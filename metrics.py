@@ -0,0 +1,284 @@
+"""
+Metrics Module
+Minimal Prometheus-compatible counters, histograms and gauges for the
+analysis pipeline and API.
+
+Set METRICS_ENABLED=0 to turn collection off; instrumentation then reduces
+to shared no-op objects so the per-frame overhead is a method call.
+"""
+
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# Seconds; covers per-stage totals from short clips to full matches
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels"""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            for key, val in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(val)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with optional labels"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, c in zip(self.buckets, counts):
+                    cumulative += c
+                    le = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+                lbl = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{lbl} {_format_value(total)}")
+                lines.append(f"{self.name}_count{lbl} {count}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are read from a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str,
+                 callback: Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]):
+        super().__init__(name, help_text)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        try:
+            samples = self.callback()
+        except Exception as e:
+            print(f"Warning: metrics callback {self.name} failed: {e}")
+            return lines
+        for labels, val in samples.items():
+            names = [n for n, _ in labels]
+            values = [v for _, v in labels]
+            lines.append(f"{self.name}{_format_labels(names, values)} {_format_value(val)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge_callback(self, name: str, help_text: str, callback: Callable) -> CallbackGauge:
+        return self.register(CallbackGauge(name, help_text, callback))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+FEATURE_LABELS = ('court', 'shuttle', 'advanced')
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "bd_pipeline_stage_seconds",
+    "Time spent per process_video stage, per video",
+    labels=('stage',) + FEATURE_LABELS,
+)
+VIDEOS_PROCESSED = REGISTRY.counter(
+    "bd_pipeline_videos_total",
+    "Videos processed by process_video",
+    labels=FEATURE_LABELS,
+)
+FRAMES_PROCESSED = REGISTRY.counter(
+    "bd_pipeline_frames_total",
+    "Frames decoded and analyzed by process_video",
+    labels=FEATURE_LABELS,
+)
+UPLOAD_SECONDS = REGISTRY.histogram(
+    "bd_upload_seconds",
+    "End-to-end /upload handler latency",
+    labels=('status',) + FEATURE_LABELS,
+)
+UPLOADS = REGISTRY.counter(
+    "bd_uploads_total",
+    "/upload requests by outcome",
+    labels=('status',) + FEATURE_LABELS,
+)
+
+
+def feature_labels(court: bool, shuttle: bool, advanced: bool) -> Dict[str, str]:
+    """Label set describing the enabled feature flags"""
+    return {
+        'court': str(bool(court)).lower(),
+        'shuttle': str(bool(shuttle)).lower(),
+        'advanced': str(bool(advanced)).lower(),
+    }
+
+
+class StageTimer:
+    """
+    Accumulates wall time per pipeline stage for one video
+
+    Per-frame stages are summed across the video and observed once in
+    finish(), so the histogram shows where each video's time went.
+    """
+
+    def __init__(self, labels: Dict[str, str]):
+        self.labels = labels
+        self.totals: Dict[str, float] = {}
+        self.frames = 0
+
+    def time(self, stage: str):
+        return _StageContext(self, stage)
+
+    def add(self, stage: str, seconds: float):
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+
+    def count_frame(self):
+        self.frames += 1
+
+    def finish(self):
+        for stage, seconds in self.totals.items():
+            STAGE_SECONDS.observe(seconds, stage=stage, **self.labels)
+        VIDEOS_PROCESSED.inc(**self.labels)
+        FRAMES_PROCESSED.inc(self.frames, **self.labels)
+
+
+class _StageContext:
+    __slots__ = ('timer', 'stage', 'start')
+
+    def __init__(self, timer: StageTimer, stage: str):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullStageTimer:
+    """Stand-in used when metrics are disabled"""
+    _ctx = nullcontext()
+
+    def time(self, stage: str):
+        return self._ctx
+
+    def add(self, stage: str, seconds: float):
+        pass
+
+    def count_frame(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NULL_TIMER = _NullStageTimer()
+
+
+def stage_timer(court: bool, shuttle: bool, advanced: bool):
+    """Return a StageTimer, or a shared no-op timer when metrics are disabled"""
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return StageTimer(feature_labels(court, shuttle, advanced))
+
+
+def render_latest() -> str:
+    """Prometheus text exposition of all registered metrics"""
+    return REGISTRY.render()
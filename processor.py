@@ -8,6 +8,8 @@ import math
 import os
 from datetime import datetime
 
+from metrics import stage_timer
+
 # Import new features (v1.1 and v1.2)
 try:
     from court_detector import CourtDetector
@@ -399,6 +401,8 @@ def process_video(input_path: str, output_path: str, shot_model_path: Optional[s
     - Calculate distance measurements (v1.2) - optional
     - Write annotated video and return enhanced report
     """
+    stages = stage_timer(enable_court_detection, enable_shuttle_tracking, enable_advanced_analysis)
+
     # Initialize enhanced features based on flags
     court_detector = None
     shuttle_tracker = None
@@ -423,29 +427,34 @@ def process_video(input_path: str, output_path: str, shot_model_path: Optional[s
     frames = []
     landmarks_seq = []
     shuttle_positions = []
+    shuttle_prepared = []  # model inputs, inferred in batches after decoding
     court_detected = False
     court_info = None
 
     with mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
         frame_idx = 0
-        success, frame = cap.read()
+        with stages.time('decode'):
+            success, frame = cap.read()
         while success:
-            h, w = frame.shape[:2]
-            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = pose.process(image_rgb)
-            normalized = [(None, None)] * 33
-            
-            if results.pose_landmarks:
-                lm = results.pose_landmarks.landmark
-                pts = normalize_landmarks(lm, w, h)
-                normalized = pts
-                annotated = draw_landmarks_on_image(frame, pts)
-            else:
-                annotated = frame.copy()
+            stages.count_frame()
+            with stages.time('pose'):
+                h, w = frame.shape[:2]
+                image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                results = pose.process(image_rgb)
+                normalized = [(None, None)] * 33
+
+                if results.pose_landmarks:
+                    lm = results.pose_landmarks.landmark
+                    pts = normalize_landmarks(lm, w, h)
+                    normalized = pts
+                    annotated = draw_landmarks_on_image(frame, pts)
+                else:
+                    annotated = frame.copy()
             
             # v1.1: Detect court (only on first few frames for efficiency)
             if court_detector and not court_detected and frame_idx < 10:
-                court_result = court_detector.detect_court(frame)
+                with stages.time('court'):
+                    court_result = court_detector.detect_court(frame)
                 if court_result and court_result.get('detected'):
                     court_info = court_result
                     court_detected = True
@@ -454,16 +463,13 @@ def process_video(input_path: str, output_path: str, shot_model_path: Optional[s
                         advanced_analyzer.initialize_perspective(court_result['keypoints'])
                     print(f"✓ Court detected at frame {frame_idx}")
             
-            # v1.1: Track shuttlecock
-            shuttle_pos = None
+            # v1.1: Track shuttlecock (model path is batched after the loop)
             if shuttle_tracker:
-                shuttle_pos = shuttle_tracker.detect_shuttlecock(frame)
-                shuttle_positions.append(shuttle_pos)
-                
-                # Draw shuttlecock on annotated frame
-                if shuttle_pos:
-                    cv2.circle(annotated, shuttle_pos, 8, (0, 255, 255), -1)
-                    cv2.circle(annotated, shuttle_pos, 12, (0, 255, 0), 2)
+                with stages.time('shuttle'):
+                    if shuttle_tracker.model is not None:
+                        shuttle_prepared.append(shuttle_tracker.prepare_frame(frame))
+                    else:
+                        shuttle_positions.append(shuttle_tracker.detect_shuttlecock(frame))
             
             # Draw court overlay if detected
             if court_detected and court_detector and court_info:
@@ -472,46 +478,57 @@ def process_video(input_path: str, output_path: str, shot_model_path: Optional[s
             frames.append(cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB))
             landmarks_seq.append(normalized)
             frame_idx += 1
-            success, frame = cap.read()
+            with stages.time('decode'):
+                success, frame = cap.read()
 
     cap.release()
 
+    if shuttle_tracker and shuttle_prepared:
+        with stages.time('shuttle'):
+            shuttle_positions = shuttle_tracker.track_prepared(
+                np.stack(shuttle_prepared), frames[0].shape
+            )
+        shuttle_prepared = []
+
     # Enhanced contact detection (v1.1): combine wrist velocity + ball tracking
-    contact_idx, avg_wrist_v, wrist_vels = detect_contact_frame_by_wrist(landmarks_seq)
+    with stages.time('contact'):
+        contact_idx, avg_wrist_v, wrist_vels = detect_contact_frame_by_wrist(landmarks_seq)
     
-    # Refine contact detection with shuttlecock tracking
-    if shuttle_tracker and any(shuttle_positions):
-        # Extract wrist positions for comparison
-        wrist_positions = []
-        for lm in landmarks_seq:
-            if len(lm) > 16 and lm[16][0] is not None:
-                wrist_positions.append(lm[16])  # Right wrist
-            else:
-                wrist_positions.append(None)
+        # Refine contact detection with shuttlecock tracking
+        if shuttle_tracker and any(shuttle_positions):
+            # Extract wrist positions for comparison
+            wrist_positions = []
+            for lm in landmarks_seq:
+                if len(lm) > 16 and lm[16][0] is not None:
+                    wrist_positions.append(lm[16])  # Right wrist
+                else:
+                    wrist_positions.append(None)
         
-        # Find contact using ball-wrist proximity
-        ball_contact = shuttle_tracker.detect_contact_frame(shuttle_positions, wrist_positions)
-        if ball_contact is not None:
-            contact_idx = ball_contact
-            print(f"✓ Contact refined using shuttlecock tracking: frame {contact_idx}")
+            # Find contact using ball-wrist proximity
+            ball_contact = shuttle_tracker.detect_contact_frame(shuttle_positions, wrist_positions)
+            if ball_contact is not None:
+                contact_idx = ball_contact
+                print(f"✓ Contact refined using shuttlecock tracking: frame {contact_idx}")
     
     contact_time = contact_idx / (fps or 25)
 
     # run optional model
     model_shot_pred = None
     model_status = None
-    if shot_model_path:
-        model_shot_pred, model_status = try_run_shot_model(input_path, shot_model_path)
-        if model_shot_pred is None:
-            shot = detect_shot_by_heuristic(landmarks_seq)
+    with stages.time('classifier'):
+        if shot_model_path:
+            model_shot_pred, model_status = try_run_shot_model(input_path, shot_model_path)
+            if model_shot_pred is None:
+                shot = detect_shot_by_heuristic(landmarks_seq)
+            else:
+                shot = model_shot_pred
         else:
-            shot = model_shot_pred
-    else:
-        model_status = "no_model_provided"
-        shot = detect_shot_by_heuristic(landmarks_seq)
+            model_status = "no_model_provided"
+            shot = detect_shot_by_heuristic(landmarks_seq)
 
     # posture evaluation at contact
-    posture_report = evaluate_posture(landmarks_seq, contact_idx, neighborhood=3, shot=shot)
+    with stages.time('posture'):
+        posture_report = evaluate_posture(landmarks_seq, contact_idx, neighborhood=3, shot=shot)
     
     # v1.2: Advanced analysis with perspective transform and professional comparison
     advanced_measurements = {}
@@ -553,40 +570,47 @@ def process_video(input_path: str, output_path: str, shot_model_path: Optional[s
                     print(f"✓ Distance measurements calculated")
 
     # annotate contact frame visually on annotated frames
-    annotated_frames = []
-    for i, img in enumerate(frames):
-        fimg = img.copy()
-        if i == contact_idx:
-            h, w = fimg.shape[:2]
-            cv2.putText(fimg, f"CONTACT @ {contact_time:.2f}s", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
-            # Draw professional comparison score if available
-            if professional_comparison and 'overall_score' in professional_comparison:
-                score = professional_comparison['overall_score']
-                cv2.putText(fimg, f"Form Score: {score:.1f}/100", (10, 70),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-            # try to draw wrists if present
-            if i < len(landmarks_seq):
-                lm = landmarks_seq[i]
-                for idx in (15, 16):
-                    if idx < len(lm):
-                        x, y = lm[idx]
-                        if x is not None:
-                            cv2.circle(fimg, (int(x), int(y)), 8, (0, 0, 255), -1)
+    with stages.time('render'):
+        annotated_frames = []
+        for i, img in enumerate(frames):
+            fimg = img.copy()
+            # Draw shuttlecock marker (frames are RGB here)
+            if shuttle_tracker and i < len(shuttle_positions) and shuttle_positions[i]:
+                cv2.circle(fimg, shuttle_positions[i], 8, (255, 255, 0), -1)
+                cv2.circle(fimg, shuttle_positions[i], 12, (0, 255, 0), 2)
+            if i == contact_idx:
+                h, w = fimg.shape[:2]
+                cv2.putText(fimg, f"CONTACT @ {contact_time:.2f}s", (10, 30), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
+                # Draw professional comparison score if available
+                if professional_comparison and 'overall_score' in professional_comparison:
+                    score = professional_comparison['overall_score']
+                    cv2.putText(fimg, f"Form Score: {score:.1f}/100", (10, 70),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                # try to draw wrists if present
+                if i < len(landmarks_seq):
+                    lm = landmarks_seq[i]
+                    for idx in (15, 16):
+                        if idx < len(lm):
+                            x, y = lm[idx]
+                            if x is not None:
+                                cv2.circle(fimg, (int(x), int(y)), 8, (0, 0, 255), -1)
         
-        # Draw shuttlecock trajectory (only if enough valid detections)
-        if shuttle_tracker and shuttle_positions:
-            valid_count = sum(1 for pos in shuttle_positions[:i+1] if pos)
-            # Only draw trajectory if we have at least 5 valid detections
-            if valid_count >= 5:
-                fimg = shuttle_tracker.draw_trajectory(fimg, shuttle_positions[:i+1], i)
+            # Draw shuttlecock trajectory (only if enough valid detections)
+            if shuttle_tracker and shuttle_positions:
+                valid_count = sum(1 for pos in shuttle_positions[:i+1] if pos)
+                # Only draw trajectory if we have at least 5 valid detections
+                if valid_count >= 5:
+                    fimg = shuttle_tracker.draw_trajectory(fimg, shuttle_positions[:i+1], i)
         
-        annotated_frames.append(fimg)
+            annotated_frames.append(fimg)
 
     # write annotated video
-    clip = ImageSequenceClip(annotated_frames, fps=fps)
-    tmp_out = output_path
-    clip.write_videofile(tmp_out, codec="libx264", audio=False, logger=None)
+    with stages.time('encode'):
+        clip = ImageSequenceClip(annotated_frames, fps=fps)
+        tmp_out = output_path
+        clip.write_videofile(tmp_out, codec="libx264", audio=False, logger=None)
+    stages.finish()
 
     # Build enhanced report
     report = {
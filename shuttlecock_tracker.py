@@ -9,17 +9,48 @@ Simplified for integration with BD-Posture-Validation-Prototype
 
 import cv2
 import numpy as np
+from collections import deque
 from typing import List, Optional, Tuple, Dict
 import torch
 
+from kalman_filter import ConstantAccelerationKalman
+
+# TrackNet input resolution (width, height)
+MODEL_INPUT_SIZE = (512, 288)
+
 
 class ShuttlecockTracker:
     """Tracks shuttlecock position and trajectory"""
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, batch_size: int = 8,
+                 fallback_width: int = 320, use_motion_model: bool = True,
+                 max_misses: int = 3):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model = None
         self.trajectory = []
+        self.batch_size = max(1, batch_size)
+        
+        # Fallback detector: running background at reduced resolution
+        self.fallback_width = fallback_width
+        self.background_alpha = 0.05
+        self.motion_threshold = 20
+        self.brightness_threshold = 150
+        self._background = None
+        self._frames_since_refresh = 0
+        self.background_refresh = 10  # full-frame background update interval while windowed
+        
+        # Motion model: search a window around the predicted position and
+        # fall back to a full-frame search after max_misses consecutive misses
+        self.use_motion_model = use_motion_model
+        self.kalman = ConstantAccelerationKalman()
+        self.max_misses = max_misses
+        self.min_search_radius = 48   # px in frame coordinates
+        self.max_search_radius = 240
+        self._misses = 0
+        
+        # Consecutive frames stacked per forward pass (TrackNet uses 3)
+        self.frames_per_window = 1
+        self._window = deque(maxlen=1)
         
         if model_path:
             self.load_model(model_path)
@@ -29,32 +60,114 @@ class ShuttlecockTracker:
         try:
             self.model = torch.load(model_path, map_location=self.device)
             self.model.eval()
-            print(f"Shuttlecock tracking model loaded from {model_path}")
+            self.frames_per_window = self._infer_frames_per_window()
+            self._window = deque(maxlen=self.frames_per_window)
+            print(f"Shuttlecock tracking model loaded from {model_path} "
+                  f"({self.frames_per_window} frame(s) per window)")
         except Exception as e:
             print(f"Warning: Could not load tracking model: {e}")
             self.model = None
     
+    def _infer_frames_per_window(self) -> int:
+        """Number of stacked RGB frames the model expects, from its first conv"""
+        for module in self.model.modules():
+            if isinstance(module, torch.nn.Conv2d):
+                return max(1, module.in_channels // 3)
+        return 1
+    
     def track_sequence(self, frames: List[np.ndarray]) -> List[Optional[Tuple[int, int]]]:
         """
         Track shuttlecock across multiple frames
         
+        With a model loaded, frames are resized once and inferred in
+        batches of overlapping windows (see track_prepared).
+        
         Args:
             frames: List of video frames
             
         Returns:
             List of (x, y) positions or None for each frame
         """
-        positions = []
+        if self.model is not None and frames:
+            prepared = np.stack([self.prepare_frame(f) for f in frames])
+            positions = self.track_prepared(prepared, frames[0].shape)
+        else:
+            positions = [self.detect_shuttlecock(frame) for frame in frames]
         
-        for i, frame in enumerate(frames):
-            pos = self.detect_shuttlecock(frame)
-            positions.append(pos)
-            
+        for i, pos in enumerate(positions):
             if pos:
                 self.trajectory.append((i, pos[0], pos[1]))
         
         return positions
     
+    def prepare_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Resize frame to model input size, kept as uint8 HWC to save memory"""
+        return cv2.resize(frame, MODEL_INPUT_SIZE)
+    
+    def track_prepared(self, prepared: np.ndarray,
+                       original_shape: Tuple) -> List[Optional[Tuple[int, int]]]:
+        """
+        Batched sequence inference over preprocessed frames
+        
+        Frame t is inferred from the window [t - n + 1, ..., t] (clamped at
+        the start). Windows overlap, so each frame is resized once and
+        gathered by index into every window that uses it; B windows run
+        per forward pass and their heatmaps are decoded together.
+        
+        Args:
+            prepared: (T, 288, 512, 3) uint8 frames from prepare_frame()
+            original_shape: Shape of the source frames, for rescaling
+            
+        Returns:
+            List of (x, y) positions or None for each frame
+        """
+        if self.model is None:
+            raise RuntimeError("track_prepared requires a loaded model")
+        
+        T = len(prepared)
+        n = self.frames_per_window
+        offsets = np.arange(-n + 1, 1)
+        frames_chw = torch.from_numpy(np.ascontiguousarray(prepared)).permute(0, 3, 1, 2)
+        positions: List[Optional[Tuple[int, int]]] = []
+        
+        for start in range(0, T, self.batch_size):
+            stop = min(T, start + self.batch_size)
+            idx = np.clip(np.arange(start, stop)[:, None] + offsets[None, :], 0, T - 1)
+            batch = frames_chw[torch.from_numpy(idx)]  # (B, n, 3, H, W) uint8
+            B, _, C, H, W = batch.shape
+            batch = batch.reshape(B, n * C, H, W).to(self.device, dtype=torch.float32).div_(255.0)
+            
+            try:
+                with torch.no_grad():
+                    output = self.model(batch)
+                heatmaps = self._select_heatmaps(output, n).cpu().numpy()
+                positions.extend(self._heatmaps_to_positions(heatmaps, original_shape))
+            except Exception as e:
+                print(f"Shuttlecock batch detection error: {e}")
+                positions.extend([None] * B)
+        
+        # Gate full-frame peaks to the predicted window and smooth them
+        if self.use_motion_model:
+            gated = []
+            for pos in positions:
+                roi = self._predict_search_window(original_shape)
+                if pos is not None and roi is not None and not self._in_window(pos, roi):
+                    pos = None
+                gated.append(self._apply_motion_model(pos, windowed=roi is not None))
+            positions = gated
+        
+        return positions
+    
+    @staticmethod
+    def _select_heatmaps(output: torch.Tensor, frames_per_window: int) -> torch.Tensor:
+        """Reduce model output to one (B, H, W) heatmap per window's last frame"""
+        if isinstance(output, (tuple, list)):
+            output = output[0]
+        if output.dim() == 4:
+            # (B, n, H, W) -> heatmap of the newest frame in each window
+            return output[:, -1]
+        return output
+    
     def detect_shuttlecock(self, frame: np.ndarray) -> Optional[Tuple[int, int]]:
         """
         Detect shuttlecock in a single frame
@@ -62,29 +175,89 @@ class ShuttlecockTracker:
         Returns:
             (x, y) position or None if not detected
         """
+        roi = self._predict_search_window(frame.shape)
+        
         if self.model is None:
-            return self._fallback_detection(frame)
+            candidates = self.detect_candidates(frame, roi=roi)
+            position = candidates[0]['position'] if candidates else None
+            return self._apply_motion_model(position, windowed=roi is not None)
         
         try:
-            # Preprocess
-            img_tensor = self._preprocess(frame)
+            # Preprocess and append to the rolling window of recent frames
+            self._window.append(self._preprocess(frame))
+            while len(self._window) < self.frames_per_window:
+                self._window.appendleft(self._window[0])
+            img_tensor = torch.cat(list(self._window), dim=0)
             
             # Run detection
             with torch.no_grad():
-                heatmap = self.model(img_tensor.unsqueeze(0).to(self.device))
+                output = self.model(img_tensor.unsqueeze(0).to(self.device))
             
             # Get position from heatmap
-            heatmap = heatmap.squeeze().cpu().numpy()
-            return self._heatmap_to_position(heatmap, frame.shape)
+            heatmaps = self._select_heatmaps(output, self.frames_per_window).cpu().numpy()
+            position = self._heatmaps_to_positions(heatmaps, frame.shape, roi=roi)[0]
+            return self._apply_motion_model(position, windowed=roi is not None)
             
         except Exception as e:
             print(f"Shuttlecock detection error: {e}")
             return None
     
+    def _predict_search_window(self, frame_shape: Tuple) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Advance the motion model by one frame and return the search window
+        
+        Returns:
+            (x0, y0, x1, y1) in frame coordinates, or None when the track is
+            not established or lost (full-frame search)
+        """
+        if not self.use_motion_model:
+            return None
+        predicted = self.kalman.predict()
+        if predicted is None or self._misses >= self.max_misses:
+            return None
+        
+        radius = int(np.clip(self.min_search_radius + 3.0 * self.kalman.position_sigma(),
+                             self.min_search_radius, self.max_search_radius))
+        h, w = frame_shape[:2]
+        x0 = max(0, int(predicted[0]) - radius)
+        y0 = max(0, int(predicted[1]) - radius)
+        x1 = min(w, int(predicted[0]) + radius + 1)
+        y1 = min(h, int(predicted[1]) + radius + 1)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None  # prediction left the frame
+        return (x0, y0, x1, y1)
+    
+    @staticmethod
+    def _in_window(position: Tuple[int, int], roi: Tuple[int, int, int, int]) -> bool:
+        return roi[0] <= position[0] < roi[2] and roi[1] <= position[1] < roi[3]
+    
+    def _apply_motion_model(self, position: Optional[Tuple[int, int]],
+                            windowed: bool) -> Optional[Tuple[int, int]]:
+        """
+        Feed a detection (or a miss) to the motion model
+        
+        Returns:
+            Filtered (x, y) position, or None on a miss
+        """
+        if not self.use_motion_model:
+            return position
+        if position is None:
+            self._misses += 1
+            return None
+        
+        if windowed:
+            filtered = self.kalman.update(position)
+        else:
+            # New or re-acquired track: restart with unknown velocity
+            self.kalman.initialize(position)
+            filtered = position
+        self._misses = 0
+        return (int(round(filtered[0])), int(round(filtered[1])))
+    
     def _preprocess(self, frame: np.ndarray) -> torch.Tensor:
         """Preprocess frame for model"""
         # Resize to model input size (typically 512x288 for TrackNet)
-        img = cv2.resize(frame, (512, 288))
+        img = self.prepare_frame(frame)
         img = img.astype(np.float32) / 255.0
         img_tensor = torch.from_numpy(img).permute(2, 0, 1)
         return img_tensor
@@ -92,73 +265,168 @@ class ShuttlecockTracker:
     def _heatmap_to_position(self, heatmap: np.ndarray, 
                             original_shape: Tuple) -> Optional[Tuple[int, int]]:
         """Convert heatmap to (x, y) position"""
-        # Find maximum in heatmap
-        if heatmap.max() < 0.5:  # Confidence threshold
-            return None
+        return self._heatmaps_to_positions(heatmap[None], original_shape)[0]
+    
+    def _heatmaps_to_positions(self, heatmaps: np.ndarray,
+                               original_shape: Tuple,
+                               roi: Optional[Tuple[int, int, int, int]] = None
+                               ) -> List[Optional[Tuple[int, int]]]:
+        """
+        Decode a (B, H, W) stack of heatmaps in one pass
         
-        y, x = np.unravel_index(heatmap.argmax(), heatmap.shape)
+        Args:
+            heatmaps: Model output heatmaps
+            original_shape: Source frame shape
+            roi: Optional (x0, y0, x1, y1) search window in frame coordinates
         
-        # Scale back to original frame size
+        Returns:
+            (x, y) per heatmap in original frame coordinates, or None below
+            the confidence threshold
+        """
         h, w = original_shape[:2]
-        x_scaled = int(x * w / heatmap.shape[1])
-        y_scaled = int(y * h / heatmap.shape[0])
+        _, full_hh, full_hw = heatmaps.shape
+        ox = oy = 0
+        if roi is not None:
+            ox = int(roi[0] * full_hw / w)
+            oy = int(roi[1] * full_hh / h)
+            ex = max(ox + 1, int(np.ceil(roi[2] * full_hw / w)))
+            ey = max(oy + 1, int(np.ceil(roi[3] * full_hh / h)))
+            heatmaps = heatmaps[:, oy:ey, ox:ex]
+        
+        B, hh, hw = heatmaps.shape
+        flat = heatmaps.reshape(B, -1)
+        peak_idx = flat.argmax(axis=1)
+        peak_val = flat[np.arange(B), peak_idx]
         
-        return (x_scaled, y_scaled)
+        # Scale back to original frame size
+        ys, xs = np.unravel_index(peak_idx, (hh, hw))
+        xs = ((xs + ox) * w / full_hw).astype(int)
+        ys = ((ys + oy) * h / full_hh).astype(int)
+        
+        confident = peak_val >= 0.5  # Confidence threshold
+        return [(int(x), int(y)) if ok else None for x, y, ok in zip(xs, ys, confident)]
     
     def _fallback_detection(self, frame: np.ndarray) -> Optional[Tuple[int, int]]:
         """
         Fallback detection using traditional CV
-        Looks for small white/yellow circular objects (shuttlecock)
+        Returns the best-ranked moving bright blob (see detect_candidates)
+        """
+        candidates = self.detect_candidates(frame)
+        if not candidates:
+            return None
+        return candidates[0]['position']
+    
+    def detect_candidates(self, frame: np.ndarray,
+                          roi: Optional[Tuple[int, int, int, int]] = None,
+                          max_candidates: int = 5) -> List[Dict]:
         """
-        # Convert to grayscale for better detection
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        Find moving bright blobs against a running background model
         
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        Works on a grayscale copy downscaled to fallback_width. The
+        background is an exponential running average, so static bright
+        objects (lights, court lines) are absorbed and never reported.
+        The first frame only initializes the background.
         
-        # Threshold for bright objects (shuttlecock is bright white)
-        _, thresh = cv2.threshold(blurred, 240, 255, cv2.THRESH_BINARY)
+        With a search window only that crop is resized and compared; the
+        full background is still refreshed every background_refresh frames.
         
-        # Morphological operations to remove noise
-        kernel = np.ones((3, 3), np.uint8)
-        thresh = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-        thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+        Args:
+            frame: BGR video frame
+            roi: Optional (x0, y0, x1, y1) search window in frame coordinates
+            max_candidates: Max number of candidates returned
+            
+        Returns:
+            List of dicts with 'position' (x, y in frame coordinates),
+            'score' and 'area', best candidate first
+        """
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.fallback_width / float(w))
+        small_size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
         
-        # Find contours
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, 
-                                       cv2.CHAIN_APPROX_SIMPLE)
+        bg_shape = (small_size[1], small_size[0])
         
-        if not contours:
-            return None
+        if self._background is None or self._background.shape != bg_shape:
+            small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+            self._background = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+            self._frames_since_refresh = 0
+            return []
         
-        # Filter for shuttlecock-sized objects (small, roughly circular)
-        valid_contours = []
-        for c in contours:
-            area = cv2.contourArea(c)
-            # Shuttlecock is typically 10-200 pixels in area
-            if 10 < area < 200:
-                # Check circularity
-                perimeter = cv2.arcLength(c, True)
-                if perimeter > 0:
-                    circularity = 4 * np.pi * area / (perimeter * perimeter)
-                    # Shuttlecock should be roughly circular (circularity > 0.5)
-                    if circularity > 0.5:
-                        valid_contours.append(c)
-        
-        if not valid_contours:
-            return None
+        # Low-resolution crop bounds (whole frame unless windowed)
+        lx0, ly0, lx1, ly1 = 0, 0, small_size[0], small_size[1]
+        self._frames_since_refresh += 1
+        if roi is not None and self._frames_since_refresh < self.background_refresh:
+            lx0 = max(0, int(roi[0] * scale))
+            ly0 = max(0, int(roi[1] * scale))
+            lx1 = min(small_size[0], max(lx0 + 1, int(np.ceil(roi[2] * scale))))
+            ly1 = min(small_size[1], max(ly0 + 1, int(np.ceil(roi[3] * scale))))
+            crop = frame[int(ly0 / scale):int(np.ceil(ly1 / scale)),
+                         int(lx0 / scale):int(np.ceil(lx1 / scale))]
+            small = cv2.resize(crop, (lx1 - lx0, ly1 - ly0), interpolation=cv2.INTER_AREA)
+        else:
+            small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+            self._frames_since_refresh = 0
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
         
-        # Get centroid of the most circular small contour
-        c = max(valid_contours, key=lambda x: 4 * np.pi * cv2.contourArea(x) / (cv2.arcLength(x, True) ** 2))
-        M = cv2.moments(c)
+        background = self._background[ly0:ly1, lx0:lx1]
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(background))
+        # In-place running average on the (possibly windowed) background view
+        background *= (1.0 - self.background_alpha)
+        background += self.background_alpha * gray
         
-        if M["m00"] == 0:
-            return None
+        if roi is not None and (lx0, ly0, lx1, ly1) == (0, 0, small_size[0], small_size[1]):
+            # Full refresh frame while tracking: only report blobs in the window
+            window = np.zeros_like(diff)
+            window[max(0, int(roi[1] * scale)):int(np.ceil(roi[3] * scale)),
+                   max(0, int(roi[0] * scale)):int(np.ceil(roi[2] * scale))] = 1
+            diff = diff * window
+        
+        # Moving AND bright (shuttle is white; blur at low resolution dims it)
+        mask = ((diff > self.motion_threshold) & (gray > self.brightness_threshold)).astype(np.uint8)
+        if not mask.any():
+            return []
+        mask = cv2.dilate(mask, np.ones((3, 3), np.uint8))
         
-        cx = int(M["m10"] / M["m00"])
-        cy = int(M["m01"] / M["m00"])
+        n_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if n_labels <= 1:
+            return []
         
-        return (cx, cy)
+        # Per-blob mean motion strength in one pass
+        motion = np.bincount(labels.ravel(), weights=diff.ravel().astype(np.float64),
+                             minlength=n_labels)
+        areas = stats[:, cv2.CC_STAT_AREA].astype(np.float64)
+        bw = stats[:, cv2.CC_STAT_WIDTH].astype(np.float64)
+        bh = stats[:, cv2.CC_STAT_HEIGHT].astype(np.float64)
+        
+        # Shuttlecock is typically 10-200 pixels in area at full resolution
+        full_areas = areas / (scale * scale)
+        valid = (full_areas > 10) & (full_areas < 200 * 4)
+        valid[0] = False  # background label
+        if not valid.any():
+            return []
+        
+        # Rank by motion strength and compactness (round blobs fill their box)
+        mean_motion = motion / np.maximum(areas, 1)
+        fill = areas / np.maximum(bw * bh, 1)
+        aspect = np.minimum(bw, bh) / np.maximum(np.maximum(bw, bh), 1)
+        score = mean_motion / 255.0 * (0.5 + 0.5 * fill) * (0.5 + 0.5 * aspect)
+        
+        order = [i for i in np.argsort(-score) if valid[i]][:max_candidates]
+        return [
+            {
+                'position': (int((centroids[i][0] + lx0) / scale), int((centroids[i][1] + ly0) / scale)),
+                'score': float(score[i]),
+                'area': float(full_areas[i]),
+            }
+            for i in order
+        ]
+    
+    def reset(self):
+        """Clear per-video state (background model, frame window, trajectory)"""
+        self._background = None
+        self._window.clear()
+        self.kalman.reset()
+        self._misses = 0
+        self.clear_trajectory()
     
     def detect_contact_frame(self, positions: List[Optional[Tuple]], 
                             wrist_positions: List[Tuple]) -> Optional[int]:
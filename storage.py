@@ -0,0 +1,230 @@
+"""
+Storage Lifecycle Module
+Tracks uploads and generated artifacts in a small SQLite index and keeps
+UPLOAD_DIR / OUTPUT_DIR within a byte budget.
+
+- Artifacts are registered once with their size; totals come from the index,
+  so enforcing the budget never has to scan the directories.
+- Eviction removes expired artifacts (TTL) first, then least recently
+  accessed ones until the budget is met.
+- Uploads are deleted once processing finishes unless retention is enabled.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class StorageManager:
+    """LRU + TTL lifecycle manager for uploaded and generated files"""
+
+    def __init__(self, directories: Iterable[Path],
+                 index_path: Path,
+                 max_bytes: int = 10 * 1024 ** 3,
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 retain_uploads: bool = False):
+        """
+        Args:
+            directories: Managed directories (files outside them are never deleted)
+            index_path: SQLite index location
+            max_bytes: Byte budget across all managed artifacts (0 = unlimited)
+            ttl_seconds: Max age since last access (0 = no expiry)
+            retain_uploads: Keep uploads after processing finishes
+        """
+        self.directories = [Path(d).resolve() for d in directories]
+        self.index_path = Path(index_path)
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = float(ttl_seconds)
+        self.retain_uploads = retain_uploads
+
+        self._lock = threading.Lock()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " path TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " job_id TEXT,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_artifacts_accessed ON artifacts(accessed_at)"
+        )
+
+    @classmethod
+    def from_env(cls, upload_dir: Path, output_dir: Path) -> "StorageManager":
+        """Build manager from STORAGE_* environment variables"""
+        index_path = os.environ.get("STORAGE_INDEX_PATH", str(Path(output_dir) / ".storage_index.db"))
+        return cls(
+            directories=[upload_dir, output_dir],
+            index_path=Path(index_path),
+            max_bytes=int(_env_float("STORAGE_MAX_BYTES", 10 * 1024 ** 3)),
+            ttl_seconds=_env_float("STORAGE_TTL_SECONDS", 7 * 24 * 3600),
+            retain_uploads=os.environ.get("STORAGE_RETAIN_UPLOADS", "").lower() in ("1", "true", "yes"),
+        )
+
+    def _is_managed(self, path: Path) -> bool:
+        resolved = path.resolve()
+        return any(d == resolved.parent or d in resolved.parents for d in self.directories)
+
+    def register(self, path: Path, kind: str, job_id: Optional[str] = None):
+        """
+        Add (or refresh) an artifact in the index
+
+        Args:
+            path: File path inside a managed directory
+            kind: 'upload', 'video', 'report', ...
+            job_id: Job that produced the artifact
+        """
+        path = Path(path)
+        if not path.exists() or not self._is_managed(path):
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO artifacts (path, kind, job_id, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(path) DO UPDATE SET size=excluded.size, accessed_at=excluded.accessed_at",
+                (str(path.resolve()), kind, job_id, path.stat().st_size, now, now)
+            )
+
+    def touch(self, path: Path):
+        """Record an access so the artifact moves to the back of the LRU order"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE artifacts SET accessed_at = ? WHERE path = ?",
+                (time.time(), str(Path(path).resolve()))
+            )
+
+    def release_upload(self, path: Path):
+        """Delete an upload once its job finished, unless uploads are retained"""
+        if self.retain_uploads:
+            return
+        self._remove([str(Path(path).resolve())])
+
+    def _remove(self, paths: List[str]) -> int:
+        freed = 0
+        with self._lock:
+            for p in paths:
+                row = self._conn.execute("SELECT size FROM artifacts WHERE path = ?", (p,)).fetchone()
+                try:
+                    os.remove(p)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Warning: Could not delete {p}: {e}")
+                    continue
+                self._conn.execute("DELETE FROM artifacts WHERE path = ?", (p,))
+                if row:
+                    freed += row[0]
+        return freed
+
+    def total_bytes(self) -> int:
+        """Total size of indexed artifacts"""
+        with self._lock:
+            return int(self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0])
+
+    def enforce(self, protect: Iterable[Path] = ()) -> Dict:
+        """
+        Evict expired artifacts, then least recently used ones over budget
+
+        Args:
+            protect: Paths that must not be evicted (e.g. artifacts of running jobs)
+
+        Returns:
+            Dict with evicted file count and freed bytes
+        """
+        protected = {str(Path(p).resolve()) for p in protect}
+        evicted = []
+
+        if self.ttl_seconds > 0:
+            cutoff = time.time() - self.ttl_seconds
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT path FROM artifacts WHERE accessed_at < ?", (cutoff,)
+                ).fetchall()
+            evicted.extend(r[0] for r in rows if r[0] not in protected)
+        freed = self._remove(evicted)
+
+        lru_evicted = []
+        if self.max_bytes > 0:
+            excess = self.total_bytes() - self.max_bytes
+            if excess > 0:
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT path, size FROM artifacts ORDER BY accessed_at ASC"
+                    ).fetchall()
+                for path, size in rows:
+                    if excess <= 0:
+                        break
+                    if path in protected:
+                        continue
+                    lru_evicted.append(path)
+                    excess -= size
+            freed += self._remove(lru_evicted)
+
+        return {'evicted': len(evicted) + len(lru_evicted), 'freed_bytes': freed}
+
+    def reconcile(self):
+        """
+        Sync the index with the managed directories (run once at startup)
+
+        Indexes files created before the manager existed and drops entries
+        whose files were removed externally.
+        """
+        with self._lock:
+            indexed = {r[0] for r in self._conn.execute("SELECT path FROM artifacts")}
+        on_disk = set()
+        index_files = {str(self.index_path.resolve())}
+        for directory in self.directories:
+            if not directory.exists():
+                continue
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.path in index_files:
+                        continue
+                    if entry.name.startswith(self.index_path.name):
+                        continue  # SQLite WAL/SHM side files
+                    path = str(Path(entry.path).resolve())
+                    on_disk.add(path)
+                    if path not in indexed:
+                        st = entry.stat()
+                        kind = 'upload' if Path(entry.path).parent.resolve() == self.directories[0] else 'output'
+                        with self._lock:
+                            self._conn.execute(
+                                "INSERT OR IGNORE INTO artifacts VALUES (?, ?, NULL, ?, ?, ?)",
+                                (path, kind, st.st_size, st.st_mtime, st.st_atime)
+                            )
+        stale = indexed - on_disk
+        with self._lock:
+            for p in stale:
+                self._conn.execute("DELETE FROM artifacts WHERE path = ?", (p,))
+
+    def stats(self) -> Dict:
+        """Artifact counts and bytes per kind"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM artifacts GROUP BY kind"
+            ).fetchall()
+        by_kind = {kind: {'files': count, 'bytes': size} for kind, count, size in rows}
+        return {
+            'total_bytes': sum(v['bytes'] for v in by_kind.values()),
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'retain_uploads': self.retain_uploads,
+            'by_kind': by_kind,
+        }
@@ -44,8 +44,12 @@ def test_shuttlecock_tracker():
     # Create tracker (fallback mode - no model)
     tracker = ShuttlecockTracker()
     
+    # Fallback detector needs a background frame before the shuttle moves in
+    background = np.zeros((480, 640, 3), dtype=np.uint8)
+    tracker.detect_shuttlecock(background)
+    
     # Create test frame with white circle (shuttlecock)
-    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame = background.copy()
     cv2.circle(frame, (320, 240), 10, (255, 255, 255), -1)
     
     # Test detection
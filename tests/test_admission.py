@@ -0,0 +1,29 @@
+import pytest
+from admission import AdmissionController, AdmissionRejected
+
+def _cost(memory_mb, seconds=10.0):
+    return {"memory_mb": memory_mb, "seconds": seconds}
+
+def test_admission_rejects_over_concurrency_with_retry_after():
+    ctrl = AdmissionController(max_concurrent_jobs=1, memory_budget_mb=1000)
+    ctrl.admit("a", _cost(100, seconds=30))
+    with pytest.raises(AdmissionRejected) as exc:
+        ctrl.admit("b", _cost(100))
+    assert exc.value.reason == "concurrency"
+    assert 1 <= exc.value.retry_after <= 30
+    stats = ctrl.stats()
+    assert stats["queue_depth"] == 1
+    assert stats["rejected_by_reason"]["concurrency"] == 1
+    ctrl.release("a")
+    ctrl.admit("b", _cost(100))
+    assert ctrl.stats()["running_jobs"] == 1
+
+def test_admission_enforces_memory_budget():
+    ctrl = AdmissionController(max_concurrent_jobs=4, memory_budget_mb=1000)
+    ctrl.admit("a", _cost(700))
+    with pytest.raises(AdmissionRejected) as exc:
+        ctrl.admit("b", _cost(400))
+    assert exc.value.reason == "memory"
+    with pytest.raises(AdmissionRejected) as exc:
+        ctrl.admit("c", _cost(2000))
+    assert exc.value.reason == "too_large"
@@ -0,0 +1,25 @@
+from metrics import MetricsRegistry, StageTimer, STAGE_SECONDS, feature_labels
+
+def test_histogram_renders_cumulative_buckets():
+    reg = MetricsRegistry()
+    h = reg.histogram("demo_seconds", "demo", labels=("stage",), buckets=(0.1, 1.0))
+    h.observe(0.05, stage="pose")
+    h.observe(0.5, stage="pose")
+    h.observe(5.0, stage="pose")
+    text = reg.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{stage="pose",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="pose",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="pose",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="pose"} 3' in text
+
+def test_stage_timer_observes_totals_with_feature_labels():
+    labels = feature_labels(True, False, True)
+    timer = StageTimer(labels)
+    with timer.time("decode"):
+        pass
+    with timer.time("decode"):
+        pass
+    timer.finish()
+    text = "\n".join(STAGE_SECONDS.render())
+    assert 'stage="decode",court="true",shuttle="false",advanced="true"' in text
@@ -0,0 +1,82 @@
+import numpy as np
+import torch
+from shuttlecock_tracker import ShuttlecockTracker
+
+class _PeakNet(torch.nn.Module):
+    """Toy TrackNet: 3-frame input, heatmap peaks where the newest frame is bright"""
+    def __init__(self):
+        super().__init__()
+        self.conv = torch.nn.Conv2d(9, 3, kernel_size=1, bias=False)
+        with torch.no_grad():
+            self.conv.weight.zero_()
+            for c in range(3):
+                self.conv.weight[c, 6:9] = 1.0 / 3.0
+
+    def forward(self, x):
+        return self.conv(x)
+
+def _frames(n=10, h=360, w=640):
+    frames = []
+    for i in range(n):
+        f = np.zeros((h, w, 3), dtype=np.uint8)
+        f[100:110, 40 * i + 20:40 * i + 30] = 255
+        frames.append(f)
+    return frames
+
+def test_batched_sequence_matches_per_frame_detection():
+    tracker = ShuttlecockTracker(batch_size=4)
+    tracker.model = _PeakNet().eval()
+    tracker.frames_per_window = tracker._infer_frames_per_window()
+    assert tracker.frames_per_window == 3
+
+    frames = _frames()
+    batched = tracker.track_sequence(frames)
+
+    tracker.reset()
+    single = [tracker.detect_shuttlecock(f) for f in frames]
+
+    assert batched == single
+    assert all(p is not None for p in batched)
+    # positions follow the moving blob left to right
+    xs = [p[0] for p in batched]
+    assert xs == sorted(xs)
+
+def test_fallback_ignores_static_lights_and_ranks_moving_blob():
+    tracker = ShuttlecockTracker()
+    detections = []
+    for i in range(8):
+        f = np.full((720, 1280, 3), (40, 90, 40), dtype=np.uint8)
+        f[90:110, 990:1010] = 255   # static light
+        f[598:602, :] = 255         # court line
+        f[295:305, 100 + 60 * i:110 + 60 * i] = 255
+        detections.append(tracker.detect_candidates(f))
+    assert detections[0] == []  # first frame only seeds the background
+    for i, cands in enumerate(detections[1:], start=1):
+        assert cands, i
+        x, y = cands[0]["position"]
+        assert abs(x - (105 + 60 * i)) < 10 and abs(y - 300) < 10
+        assert all(abs(c["position"][1] - 100) > 20 for c in cands)
+
+def test_motion_model_restricts_search_to_predicted_window():
+    tracker = ShuttlecockTracker(max_misses=2)
+    positions = []
+    for i in range(12):
+        f = np.full((720, 1280, 3), (40, 90, 40), dtype=np.uint8)
+        x = 100 + 30 * i
+        f[295:305, x:x + 10] = 255
+        if i >= 4:
+            # moving distractor far from the predicted path
+            f[600:620, 1200 - 40 * i:1220 - 40 * i] = 255
+        positions.append(tracker.detect_shuttlecock(f))
+    for i, pos in enumerate(positions[1:], start=1):
+        assert pos is not None
+        assert abs(pos[0] - (105 + 30 * i)) < 12 and abs(pos[1] - 300) < 12
+
+    # after max_misses frames without the shuttle, the whole frame is searched again
+    blank = np.full((720, 1280, 3), (40, 90, 40), dtype=np.uint8)
+    for _ in range(2):
+        assert tracker.detect_shuttlecock(blank) is None
+    f = blank.copy()
+    f[100:110, 1100:1110] = 255
+    pos = tracker.detect_shuttlecock(f)
+    assert pos is not None and abs(pos[0] - 1105) < 12
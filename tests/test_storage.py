@@ -0,0 +1,39 @@
+import time
+from storage import StorageManager
+
+def _write(path, size):
+    path.write_bytes(b"x" * size)
+    return path
+
+def test_storage_evicts_least_recently_used_over_budget(tmp_path):
+    out = tmp_path / "outputs"
+    out.mkdir()
+    mgr = StorageManager([out], tmp_path / "index.db", max_bytes=250, ttl_seconds=0)
+    a = _write(out / "a.mp4", 100)
+    b = _write(out / "b.mp4", 100)
+    mgr.register(a, "video")
+    mgr.register(b, "video")
+    time.sleep(0.01)
+    mgr.touch(a)  # b is now least recently used
+    c = _write(out / "c.mp4", 100)
+    mgr.register(c, "video")
+    result = mgr.enforce()
+    assert result["evicted"] == 1
+    assert a.exists() and c.exists() and not b.exists()
+    assert mgr.total_bytes() == 200
+
+def test_storage_releases_uploads_unless_retained(tmp_path):
+    up = tmp_path / "uploads"
+    up.mkdir()
+    mgr = StorageManager([up], tmp_path / "index.db", max_bytes=0, ttl_seconds=0)
+    f = _write(up / "clip.mp4", 10)
+    mgr.register(f, "upload")
+    mgr.release_upload(f)
+    assert not f.exists()
+    assert mgr.total_bytes() == 0
+
+    kept = StorageManager([up], tmp_path / "index2.db", retain_uploads=True)
+    g = _write(up / "clip2.mp4", 10)
+    kept.register(g, "upload")
+    kept.release_upload(g)
+    assert g.exists()